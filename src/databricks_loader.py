@@ -1,6 +1,7 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.catalog import TableInfo, ColumnInfo
+from databricks.sdk.service.catalog import TableInfo, ColumnInfo, SchemaInfo
 from .schema_storage import TableSchema, Column
 
 
@@ -10,6 +11,7 @@ class DatabricksLoader:
         self.token = os.getenv("DATABRICKS_TOKEN")
         self.catalogs_filter = os.getenv("DATABRICKS_CATALOGS", "main")
         self.schemas_filter = os.getenv("DATABRICKS_SCHEMAS", "")
+        self.list_concurrency = int(os.getenv("DATABRICKS_LIST_CONCURRENCY", "8"))
 
         if not self.host or not self.token:
             raise ValueError("DATABRICKS_HOST and DATABRICKS_TOKEN must be set")
@@ -25,11 +27,11 @@ class DatabricksLoader:
             return None
         return [c.strip() for c in self.catalogs_filter.split(",")]
 
-    def _get_schema_list(self) -> list[str] | None:
-        """Parse DATABRICKS_SCHEMAS env var. Returns None if not set or '*' (all schemas)."""
+    def _get_schema_list(self) -> frozenset[str] | None:
+        """Parse DATABRICKS_SCHEMAS env var into lowercased names. Returns None if not set or '*' (all schemas)."""
         if not self.schemas_filter or self.schemas_filter == "*":
             return None
-        return [s.strip() for s in self.schemas_filter.split(",")]
+        return frozenset(s.strip().lower() for s in self.schemas_filter.split(","))
 
     def load_catalog_schemas(self) -> list[TableSchema]:
         """Load tables from the specified catalogs and schemas."""
@@ -43,30 +45,38 @@ class DatabricksLoader:
         else:
             catalogs = catalog_filter
 
-        for catalog_name in catalogs:
-            # List all schemas in the catalog (include_browse for browse-only access)
-            for schema_info in self.client.schemas.list(
-                catalog_name=catalog_name,
-                include_browse=True
-            ):
-                schema_name = schema_info.name
-
-                # Apply schema filter if set
-                if schema_filter is not None and schema_name not in schema_filter:
-                    continue
-
-                # List all tables in the schema (include_browse for browse-only access)
-                for table_info in self.client.tables.list(
-                    catalog_name=catalog_name,
-                    schema_name=schema_name,
-                    include_browse=True
-                ):
+        with ThreadPoolExecutor(max_workers=self.list_concurrency) as executor:
+            # List schemas of all catalogs concurrently (include_browse for browse-only access)
+            schema_pairs = []
+            for catalog_name, schema_infos in zip(catalogs, executor.map(self._list_schemas, catalogs)):
+                for schema_info in schema_infos:
+                    # Apply schema filter if set
+                    if schema_filter is not None and schema_info.name.lower() not in schema_filter:
+                        continue
+                    schema_pairs.append((catalog_name, schema_info.name))
+
+            # List tables of all schemas concurrently; map keeps results in listing order
+            for table_infos in executor.map(lambda pair: self._list_tables(*pair), schema_pairs):
+                for table_info in table_infos:
                     table_schema = self._convert_table_info(table_info)
                     if table_schema:
                         results.append(table_schema)
 
         return results
 
+    def _list_schemas(self, catalog_name: str) -> list[SchemaInfo]:
+        return list(self.client.schemas.list(
+            catalog_name=catalog_name,
+            include_browse=True
+        ))
+
+    def _list_tables(self, catalog_name: str, schema_name: str) -> list[TableInfo]:
+        return list(self.client.tables.list(
+            catalog_name=catalog_name,
+            schema_name=schema_name,
+            include_browse=True
+        ))
+
     def _convert_table_info(self, table_info: TableInfo) -> TableSchema | None:
         """Convert Databricks TableInfo to our TableSchema format."""
         if not table_info.columns:
@@ -1,26 +1,106 @@
 import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
 from openai import OpenAI
 
 
 class EmbeddingService:
-    def __init__(self):
+    def __init__(self, cache_dir: str | None = None):
         self.client = OpenAI(
             api_key=os.getenv("EMBEDDING_API_KEY", "your-secret-token"),
             base_url=os.getenv("EMBEDDING_API_URL", "http://localhost:8000/v1")
         )
         self.model = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
         self.dimensions = 768
+        self.cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        self.cache_path = os.path.join(cache_dir, "embeddings_cache.npz") if cache_dir else None
+        # Cached vectors are kept as float16 to halve memory and file size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        # In-memory only cache for embed(), so ad-hoc queries never evict
+        # or persist alongside catalog embeddings
+        self.query_cache_size = 1024
+        self._query_cache: OrderedDict[str, list[float]] = OrderedDict()
+        # embed() is called from worker threads by the MCP tool handlers
+        self._cache_lock = threading.Lock()
+        self._load_cache()
+
+    def _load_cache(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            with np.load(self.cache_path) as data:
+                self._cache = OrderedDict(zip(data["keys"].tolist(), data["vectors"]))
+
+    def save_cache(self):
+        """Persist the embedding cache so restarts can skip re-embedding."""
+        if not self.cache_path or not self._cache:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._cache_lock:
+            keys = list(self._cache)
+            vectors = np.stack(list(self._cache.values()))
+        with open(self.cache_path, "wb") as f:
+            np.savez(f, keys=np.array(keys), vectors=vectors)
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self.model}\0{text}".encode(), digest_size=16).hexdigest()
+
+    def _remember(self, key: str, embedding: list[float]):
+        with self._cache_lock:
+            self._cache[key] = np.asarray(embedding, dtype=np.float16)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
 
     def embed(self, text: str) -> list[float]:
+        """Embed a single text. Memoized for repeated query_model lookups;
+        bulk ingestion goes through embed_batch instead."""
+        with self._cache_lock:
+            cached = self._query_cache.get(text)
+            if cached is not None:
+                self._query_cache.move_to_end(text)
+                return cached
+
         response = self.client.embeddings.create(
             input=text,
             model=self.model
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        with self._cache_lock:
+            self._query_cache[text] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
 
     def embed_batch(self, texts: list[str]) -> list[list[float]]:
-        response = self.client.embeddings.create(
-            input=texts,
-            model=self.model
-        )
-        return [item.embedding for item in response.data]
+        """Embed texts, sending only those not already in the cache."""
+        keys = [self._cache_key(text) for text in texts]
+        hits = {}
+        misses = {}
+        with self._cache_lock:
+            for key, text in zip(keys, texts):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    hits[key] = cached
+                else:
+                    misses[key] = text
+
+        if misses:
+            response = self.client.embeddings.create(
+                input=list(misses.values()),
+                model=self.model
+            )
+            # OpenAI returns results in input order, but sort by index to be safe
+            embeddings = [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+            fetched = dict(zip(misses, embeddings))
+        else:
+            fetched = {}
+
+        results = [
+            fetched[key] if key in fetched else hits[key].astype(np.float32).tolist()
+            for key in keys
+        ]
+
+        for key, embedding in fetched.items():
+            self._remember(key, embedding)
+        return results
@@ -1,7 +1,14 @@
 import os
 import json
+import logging
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 class Column(BaseModel):
     name: str
@@ -17,43 +24,165 @@ class TableSchema(BaseModel):
     description: str | None = None
 
 
+def _encode(obj) -> bytes:
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _decode(raw: bytes):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
 class SchemaStorage:
+    """Schema metadata persisted as an append-only JSON Lines log.
+
+    Each line is an ``add`` or ``del`` record; ``_load`` replays the log and
+    ``compact`` rewrites it to one ``add`` record per stored schema.
+    """
+
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
-        self.metadata_path = os.path.join(data_dir, "schemas.json")
+        self.metadata_path = os.path.join(data_dir, "schemas.jsonl")
+        self.legacy_path = os.path.join(data_dir, "schemas.json")
         self.schemas: dict[int, TableSchema] = {}
+        self._by_name: dict[str, int] = {}
+        # Lookup keys including "schema.table" and "table" suffixes, rebuilt lazily
+        self._aliases: dict[str, int] | None = None
+        # model_dump() of each schema, computed once and reused on every write
+        self._dumped: dict[int, dict] = {}
+        self._pending: list[bytes] = []
+        self._log_records = 0
         self._load()
 
     def _load(self):
+        imported_legacy = False
         if os.path.exists(self.metadata_path):
-            with open(self.metadata_path, "r") as f:
-                data = json.load(f)
-                self.schemas = {int(k): TableSchema(**v) for k, v in data.items()}
+            with open(self.metadata_path, "rb") as f:
+                lines = f.readlines()
+            valid_size = 0
+            for i, line in enumerate(lines):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("missing newline")
+                    record = _decode(line) if line.strip() else None
+                except ValueError:
+                    # Only the last line can be torn by a crash during flush()
+                    if i != len(lines) - 1:
+                        raise
+                    logger.warning(f"Dropping incomplete last record in {self.metadata_path}")
+                    with open(self.metadata_path, "r+b") as f:
+                        f.truncate(valid_size)
+                    break
+                valid_size += len(line)
+                if record is None:
+                    continue
+                if record["op"] == "add":
+                    self._dumped[record["id"]] = record["schema"]
+                else:
+                    self._dumped.pop(record["id"], None)
+                self._log_records += 1
+        elif os.path.exists(self.legacy_path):
+            with open(self.legacy_path, "rb") as f:
+                self._dumped = {int(k): v for k, v in _decode(f.read()).items()}
+            imported_legacy = True
 
-    def _save(self):
-        os.makedirs(self.data_dir, exist_ok=True)
-        with open(self.metadata_path, "w") as f:
-            json.dump({k: v.model_dump() for k, v in self.schemas.items()}, f, indent=2)
+        self.schemas = {k: TableSchema.model_validate(v) for k, v in self._dumped.items()}
+        self._by_name = {s.table.lower(): k for k, s in self.schemas.items()}
+
+        if imported_legacy:
+            # Convert the imported schemas.json into the log format
+            self.compact()
+            os.remove(self.legacy_path)
 
-    def add(self, vector_id: int, schema: TableSchema):
+    def _append(self, record: dict, flush: bool):
+        self._pending.append(_encode(record) + b"\n")
+        if flush:
+            self.flush()
+
+    def add(self, vector_id: int, schema: TableSchema, flush: bool = True):
+        previous = self.schemas.get(vector_id)
+        if previous is not None:
+            self._by_name.pop(previous.table.lower(), None)
         self.schemas[vector_id] = schema
-        self._save()
+        self._dumped[vector_id] = schema.model_dump()
+        self._by_name[schema.table.lower()] = vector_id
+        self._aliases = None
+        self._append({"op": "add", "id": vector_id, "schema": self._dumped[vector_id]}, flush)
+
+    def remove(self, vector_id: int, flush: bool = True):
+        schema = self.schemas.pop(vector_id, None)
+        if schema is None:
+            return
+        self._dumped.pop(vector_id, None)
+        if self._by_name.get(schema.table.lower()) == vector_id:
+            del self._by_name[schema.table.lower()]
+        self._aliases = None
+        self._append({"op": "del", "id": vector_id}, flush)
+
+    def flush(self):
+        """Append pending records to the log, compacting it once it grows past 2x the live state."""
+        if not self._pending:
+            return
+        if self._log_records + len(self._pending) > 2 * max(len(self.schemas), 1):
+            self.compact()
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        with open(self.metadata_path, "ab") as f:
+            f.writelines(self._pending)
+        self._log_records += len(self._pending)
+        self._pending.clear()
+
+    def compact(self):
+        """Rewrite the log with a single add record per stored schema."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = self.metadata_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(
+                _encode({"op": "add", "id": k, "schema": self._dumped[k]}) + b"\n"
+                for k in self.schemas
+            )
+        os.replace(tmp_path, self.metadata_path)
+        self._log_records = len(self.schemas)
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self.schemas)
 
     def get(self, vector_id: int) -> TableSchema | None:
         return self.schemas.get(vector_id)
 
+    def _build_aliases(self) -> dict[str, int]:
+        """Map every full name and unambiguous name suffix to its vector ID."""
+        aliases = dict(self._by_name)
+        suffixes: dict[str, int | None] = {}
+        for name, vector_id in self._by_name.items():
+            parts = name.split(".")
+            for i in range(1, len(parts)):
+                key = ".".join(parts[i:])
+                # A suffix shared by several tables is ambiguous
+                suffixes[key] = vector_id if key not in suffixes else None
+        for key, vector_id in suffixes.items():
+            if vector_id is not None:
+                aliases.setdefault(key, vector_id)
+        return aliases
+
     def get_by_name(self, table_name: str) -> TableSchema | None:
-        for schema in self.schemas.values():
-            if schema.table.lower() == table_name.lower():
-                return schema
-        return None
+        """Look up a schema by full name or by a unique 'schema.table' / 'table' suffix."""
+        if self._aliases is None:
+            self._aliases = self._build_aliases()
+        vector_id = self._aliases.get(table_name.lower())
+        return self.schemas.get(vector_id) if vector_id is not None else None
+
+    def get_vector_id_by_name(self, table_name: str) -> int | None:
+        return self._by_name.get(table_name.lower())
 
     def list_all(self) -> list[str]:
         return [s.table for s in self.schemas.values()]
 
     def to_text(self, schema: TableSchema) -> str:
         """Convert schema to text for embedding."""
-        cols = ", ".join([f"{c.name} ({c.type})" for c in schema.columns])
+        cols = ", ".join(f"{c.name} ({c.type})" for c in schema.columns)
         text = f"Table: {schema.table}. Columns: {cols}."
         if schema.description:
             text += f" Description: {schema.description}"
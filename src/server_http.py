@@ -1,7 +1,13 @@
 """HTTP/SSE MCP server for LM Studio and other HTTP-based clients."""
 import os
 import json
+import time
+import functools
+import fcntl
+import asyncio
 import logging
+import threading
+from contextlib import contextmanager
 from mcp.server import Server
 from mcp.server.sse import SseServerTransport
 from mcp.types import Tool, TextContent
@@ -14,13 +20,20 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.getenv("DATA_DIR", "/app/data")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+DATABRICKS_RELOAD_INTERVAL = int(os.getenv("DATABRICKS_RELOAD_INTERVAL", "3600"))
+LOCK_PATH = os.path.join(DATA_DIR, ".loader.lock")
+LOADED_MARKER_PATH = os.path.join(DATA_DIR, ".loaded")
 
 
 def cleanup_data():
-    """Delete existing vectors and schemas on startup."""
+    """Delete existing vectors and schemas so the next load starts fresh."""
     files_to_delete = [
         os.path.join(DATA_DIR, "vectors.index"),
+        os.path.join(DATA_DIR, "vectors.deleted.json"),
         os.path.join(DATA_DIR, "schemas.json"),
+        os.path.join(DATA_DIR, "schemas.jsonl"),
+        LOADED_MARKER_PATH,
     ]
     for filepath in files_to_delete:
         if os.path.exists(filepath):
@@ -28,12 +41,47 @@ def cleanup_data():
             logger.info(f"Deleted {filepath}")
 
 
-cleanup_data()
+@contextmanager
+def loader_lock():
+    """Hold an exclusive lock on DATA_DIR shared by all server processes."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-# Initialize services
-embedding_service = EmbeddingService()
-vector_store = VectorStore(DATA_DIR)
-schema_storage = SchemaStorage(DATA_DIR)
+
+def load_settings() -> dict:
+    """Settings that determine which tables are loaded and how they are embedded."""
+    return {
+        "embedding_model": os.getenv("EMBEDDING_MODEL", "nomic-embed-text"),
+        "catalogs": os.getenv("DATABRICKS_CATALOGS", "main"),
+        "schemas": os.getenv("DATABRICKS_SCHEMAS", ""),
+    }
+
+
+def load_settings_changed() -> bool:
+    """Check whether the stored data was loaded with different settings."""
+    if not os.path.exists(LOADED_MARKER_PATH):
+        return False
+    try:
+        with open(LOADED_MARKER_PATH, "r") as f:
+            return json.load(f) != load_settings()
+    except ValueError:
+        return True
+
+
+def catalog_recently_loaded() -> bool:
+    """Check whether another process finished a Databricks load within the reload interval."""
+    if not os.path.exists(LOADED_MARKER_PATH):
+        return False
+    return time.time() - os.path.getmtime(LOADED_MARKER_PATH) < DATABRICKS_RELOAD_INTERVAL
+
+
+# Serializes index/metadata access from tool calls running in worker threads
+storage_lock = threading.Lock()
 
 # Create MCP server
 mcp_server = Server("schemavault")
@@ -93,29 +141,56 @@ async def list_tools() -> list[Tool]:
     ]
 
 
+def store_schema(schema: TableSchema, embedding: list[float]) -> int:
+    """Add or update a schema and its embedding, reusing the vector ID of an existing table."""
+    with storage_lock:
+        vector_id = schema_storage.get_vector_id_by_name(schema.table)
+        if vector_id is None:
+            vector_id = vector_store.add(embedding)
+        else:
+            vector_store.update(vector_id, embedding)
+        schema_storage.add(vector_id, schema)
+        return vector_id
+
+
+def find_schema(table_name: str) -> TableSchema | None:
+    with storage_lock:
+        return schema_storage.get_by_name(table_name)
+
+
+def search_schemas(embedding: list[float], k: int) -> list[TableSchema]:
+    """Return the stored schemas closest to `embedding`."""
+    with storage_lock:
+        results = []
+        for vector_id, score in vector_store.search(embedding, k=k):
+            schema = schema_storage.get(vector_id)
+            if schema:
+                results.append(schema)
+        return results
+
+
+def list_tables() -> list[str]:
+    with storage_lock:
+        return schema_storage.list_all()
+
+
 @mcp_server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     if name == "add_schema":
         schema = TableSchema(**arguments)
         text = schema_storage.to_text(schema)
-        embedding = embedding_service.embed(text)
-        vector_id = vector_store.add(embedding)
-        schema_storage.add(vector_id, schema)
+        embedding = await asyncio.to_thread(embedding_service.embed, text)
+        vector_id = await asyncio.to_thread(store_schema, schema, embedding)
         return [TextContent(type="text", text=f"Stored schema for table '{schema.table}' with ID {vector_id}")]
 
     elif name == "query_model":
         query = arguments["query"]
-        exact = schema_storage.get_by_name(query)
+        exact = await asyncio.to_thread(find_schema, query.strip())
         if exact:
             results = [exact]
         else:
-            embedding = embedding_service.embed(query)
-            matches = vector_store.search(embedding, k=3)
-            results = []
-            for vector_id, score in matches:
-                schema = schema_storage.get(vector_id)
-                if schema:
-                    results.append(schema)
+            embedding = await asyncio.to_thread(embedding_service.embed, query)
+            results = await asyncio.to_thread(search_schemas, embedding, 3)
 
         if not results:
             return [TextContent(type="text", text=f"No schemas found for '{query}'")]
@@ -129,7 +204,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         return [TextContent(type="text", text="\n\n".join(output))]
 
     elif name == "list_models":
-        tables = schema_storage.list_all()
+        tables = await asyncio.to_thread(list_tables)
         if not tables:
             return [TextContent(type="text", text="No schemas stored yet")]
         return [TextContent(type="text", text="Stored tables:\n" + "\n".join(f"  - {t}" for t in tables))]
@@ -143,6 +218,10 @@ def load_databricks_schemas():
         logger.info("Databricks env vars not set. Skipping auto-load.")
         return
 
+    if catalog_recently_loaded():
+        logger.info("Databricks schemas were loaded recently. Skipping auto-load.")
+        return
+
     try:
         from .databricks_loader import DatabricksLoader
 
@@ -151,26 +230,102 @@ def load_databricks_schemas():
         schemas = loader.load_catalog_schemas()
 
         logger.info(f"Found {len(schemas)} tables in catalogs '{loader.catalogs_filter}'")
+        loaded_names = {schema.table.lower() for schema in schemas}
 
+        # Tables that are already stored keep their vector ID
+        stored_ids = {s.table.lower(): vector_id for vector_id, s in schema_storage.schemas.items()}
+        # Only new or changed tables need embedding
+        changed = []
         for schema in schemas:
-            text = schema_storage.to_text(schema)
-            embedding = embedding_service.embed(text)
-            vector_id = vector_store.add(embedding)
-            schema_storage.add(vector_id, schema)
-            logger.info(f"Stored: {schema.table}")
+            vector_id = stored_ids.get(schema.table.lower())
+            if vector_id is None or schema_storage.get(vector_id) != schema:
+                changed.append((schema, vector_id))
+        logger.info(f"{len(changed)} new or changed tables, {len(schemas) - len(changed)} unchanged")
+
+        vector_store.ensure_capacity(len(changed))
+        for start in range(0, len(changed), EMBEDDING_BATCH_SIZE):
+            batch = changed[start:start + EMBEDDING_BATCH_SIZE]
+            embeddings = embedding_service.embed_batch([schema_storage.to_text(schema) for schema, _ in batch])
+            new_ids = iter(vector_store.add_many(
+                [e for e, (_, vector_id) in zip(embeddings, batch) if vector_id is None],
+                flush=False
+            ))
+            for (schema, vector_id), embedding in zip(batch, embeddings):
+                if vector_id is None:
+                    vector_id = next(new_ids)
+                else:
+                    vector_store.update(vector_id, embedding, flush=False)
+                schema_storage.add(vector_id, schema, flush=False)
+                logger.info(f"Stored: {schema.table}")
+
+        # Drop tables that are no longer in the loaded catalogs
+        for name, vector_id in stored_ids.items():
+            if name not in loaded_names:
+                vector_store.delete(vector_id, flush=False)
+                schema_storage.remove(vector_id, flush=False)
+                logger.info(f"Removed: {name}")
+
+        with open(LOADED_MARKER_PATH, "w") as f:
+            json.dump(load_settings(), f)
 
         logger.info("Databricks schema load complete.")
 
     except Exception as e:
         logger.error(f"Failed to load Databricks schemas: {e}")
 
+    finally:
+        # Persist whatever was loaded, even if the load stopped part way
+        flush_storage()
+
 
-# Load schemas on module import
-load_databricks_schemas()
+def flush_storage():
+    """Write vectors, schemas and cached embeddings to disk."""
+    with storage_lock:
+        vector_store.flush()
+        schema_storage.flush()
+    embedding_service.save_cache()
+
+
+def compact_storage():
+    """Flush pending writes and compact the schema log."""
+    flush_storage()
+    with storage_lock:
+        schema_storage.compact()
+
+
+# Initialize services and load schemas on module import. The lock makes uvicorn
+# workers load one at a time, so only the first one embeds the catalog and the
+# others read its data from disk.
+with loader_lock():
+    if __name__ == "__main__":
+        cleanup_data()
+    elif load_settings_changed():
+        logger.info("Embedding model or Databricks filters changed. Reloading from scratch.")
+        cleanup_data()
+    embedding_service = EmbeddingService(DATA_DIR)
+    vector_store = VectorStore(DATA_DIR)
+    schema_storage = SchemaStorage(DATA_DIR)
+    load_databricks_schemas()
+
+
+@functools.lru_cache(maxsize=1)
+def health_body(tables: int) -> bytes:
+    """/health response body, rebuilt only when the table count changes."""
+    return b'{"status":"ok","tables":' + str(tables).encode() + b"}"
 
 
 async def app(scope, receive, send):
     """Raw ASGI application."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                compact_storage()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
     if scope["type"] != "http":
         return
 
@@ -179,7 +334,7 @@ async def app(scope, receive, send):
 
     # Health check endpoint
     if path == "/health" and method == "GET":
-        body = json.dumps({"status": "ok", "tables": len(schema_storage.list_all())})
+        body = health_body(len(schema_storage))
         await send({
             "type": "http.response.start",
             "status": 200,
@@ -187,7 +342,7 @@ async def app(scope, receive, send):
         })
         await send({
             "type": "http.response.body",
-            "body": body.encode(),
+            "body": body,
         })
         return
 
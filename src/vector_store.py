@@ -1,41 +1,102 @@
 import os
+import json
+import atexit
 import hnswlib
 import numpy as np
 
 
 class VectorStore:
-    def __init__(self, data_dir: str, dimensions: int = 768):
+    def __init__(self, data_dir: str, dimensions: int = 768, max_elements: int | None = None):
         self.data_dir = data_dir
         self.dimensions = dimensions
+        self.max_elements = max_elements or int(os.getenv("VECTOR_MAX_ELEMENTS", "10000"))
         self.index_path = os.path.join(data_dir, "vectors.index")
+        # Labels marked deleted in the index; hnswlib does not expose them itself
+        self.deleted_path = os.path.join(data_dir, "vectors.deleted.json")
         self.index = None
         self.current_id = 0
+        self._dirty = False
+        self._deleted: set[int] = set()
         self._load_or_create()
+        atexit.register(self.flush)
 
     def _load_or_create(self):
         self.index = hnswlib.Index(space="cosine", dim=self.dimensions)
         if os.path.exists(self.index_path):
             self.index.load_index(self.index_path)
             self.current_id = self.index.get_current_count()
+            if os.path.exists(self.deleted_path):
+                with open(self.deleted_path, "r") as f:
+                    self._deleted = set(json.load(f))
         else:
-            self.index.init_index(max_elements=10000, ef_construction=200, M=16)
+            self.index.init_index(max_elements=self.max_elements, ef_construction=200, M=16)
         self.index.set_ef(50)
 
-    def add(self, embedding: list[float]) -> int:
+    def add(self, embedding: list[float], flush: bool = True) -> int:
         vector = np.array([embedding], dtype=np.float32)
         item_id = self.current_id
+        self.ensure_capacity(1)
         self.index.add_items(vector, np.array([item_id]))
         self.current_id += 1
-        self._save()
+        self._dirty = True
+        if flush:
+            self.flush()
         return item_id
 
+    def add_many(self, embeddings: list[list[float]], flush: bool = True) -> list[int]:
+        """Add a batch of embeddings with a single add_items call."""
+        if not embeddings:
+            return []
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        count = len(vectors)
+        ids = np.arange(self.current_id, self.current_id + count, dtype=np.int64)
+        self.ensure_capacity(count)
+        self.index.add_items(vectors, ids)
+        self.current_id += count
+        self._dirty = True
+        if flush:
+            self.flush()
+        return ids.tolist()
+
+    def update(self, vector_id: int, embedding: list[float], flush: bool = True):
+        """Replace the embedding stored under `vector_id` in place."""
+        vector = np.array([embedding], dtype=np.float32)
+        # Adding an existing label updates its slot (and unmarks it if deleted)
+        self.index.add_items(vector, np.array([vector_id]))
+        self._deleted.discard(vector_id)
+        self._dirty = True
+        if flush:
+            self.flush()
+
+    def ensure_capacity(self, count: int):
+        """Make room for `count` more items, growing the index geometrically."""
+        capacity = self.index.get_max_elements()
+        if self.current_id + count > capacity:
+            self.index.resize_index(max(2 * capacity, self.current_id + count))
+
+    def delete(self, vector_id: int, flush: bool = True):
+        self.index.mark_deleted(vector_id)
+        self._deleted.add(vector_id)
+        self._dirty = True
+        if flush:
+            self.flush()
+
     def search(self, embedding: list[float], k: int = 5) -> list[tuple[int, float]]:
-        if self.index.get_current_count() == 0:
+        live_count = self.index.get_current_count() - len(self._deleted)
+        if live_count <= 0:
             return []
         vector = np.array([embedding], dtype=np.float32)
-        labels, distances = self.index.knn_query(vector, k=min(k, self.index.get_current_count()))
+        labels, distances = self.index.knn_query(vector, k=min(k, live_count))
         return list(zip(labels[0].tolist(), distances[0].tolist()))
 
+    def flush(self):
+        """Write the index to disk if it changed since the last flush."""
+        if self._dirty:
+            self._save()
+            self._dirty = False
+
     def _save(self):
         os.makedirs(self.data_dir, exist_ok=True)
         self.index.save_index(self.index_path)
+        with open(self.deleted_path, "w") as f:
+            json.dump(sorted(self._deleted), f)